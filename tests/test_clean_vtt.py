@@ -0,0 +1,41 @@
+import os
+import re
+
+from youtube_subtitles_server import clean_vtt
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def clean_srt_legacy(subtitles):
+    """The cleanup previously applied to yt-dlp's --convert-subs=srt output."""
+    cleaned_subtitles = re.sub(r'\d+\n\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3}\n', '', subtitles)
+    return re.sub(r'\n\s*\n', '\n', cleaned_subtitles)
+
+
+def test_youtube_auto_captions():
+    vtt = read_fixture("youtube_auto_captions.en.vtt")
+    assert clean_vtt(vtt) == read_fixture("youtube_auto_captions.en.txt")
+
+
+def test_webvtt_blocks():
+    # NOTE blocks, cue identifiers, cue settings, hour timestamps and inline tags
+    vtt = read_fixture("webvtt_blocks.en.vtt")
+    assert clean_vtt(vtt) == read_fixture("webvtt_blocks.en.txt")
+
+
+def test_parity_with_srt_conversion():
+    # youtube_auto_captions.en.srt is the fixture converted by ffmpeg, as
+    # --convert-subs=srt did. The old cleanup left a leading newline from the
+    # first cue's whitespace-only line; otherwise the output is the same.
+    srt = read_fixture("youtube_auto_captions.en.srt")
+    vtt = read_fixture("youtube_auto_captions.en.vtt")
+    assert clean_vtt(vtt) == clean_srt_legacy(srt).lstrip("\n")
+
+
+def test_header_only():
+    assert clean_vtt("WEBVTT\nKind: captions\nLanguage: en\n") == ""
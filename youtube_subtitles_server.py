@@ -1,47 +1,141 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from contextlib import asynccontextmanager
+from pathlib import Path
 from typing import AsyncIterator
 from mcp.server.fastmcp import FastMCP, Context
 import mcp.types as types
+import asyncio
+import glob
+import html
+import json
+import logging
+import multiprocessing
 import subprocess
 import os
 import tempfile
 import re
 import shutil
 import sys
+import threading
+import time
+import uuid
+
+try:
+    from yt_dlp import YoutubeDL
+except ImportError:
+    # Fall back to running the yt-dlp executable for everything
+    YoutubeDL = None
+
+log = logging.getLogger("ytsubs")
+
+def configure_logging():
+    """Send the server's log messages to stderr, at the level given by LOG_LEVEL."""
+    if log.handlers:
+        return
+    
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+    level = os.environ.get("LOG_LEVEL", "INFO").upper()
+    try:
+        log.setLevel(level)
+    except ValueError:
+        log.setLevel(logging.INFO)
+        log.warning("Unknown LOG_LEVEL %r, using INFO", level)
+    # Don't also emit through whatever handlers the MCP server installs on the root logger
+    log.propagate = False
 
 @asynccontextmanager
 async def lifespan(server: FastMCP) -> AsyncIterator[dict]:
     """
     Verify that yt-dlp is installed before starting the server.
     """
-    # Check if yt-dlp is available
-    yt_dlp_path = shutil.which("yt-dlp")
+    configure_logging()
+    
+    # Check if yt-dlp is available, or the executable given in YTDLP_BIN
+    yt_dlp_override = os.environ.get("YTDLP_BIN")
+    yt_dlp_path = shutil.which(yt_dlp_override or "yt-dlp")
     
-    if not yt_dlp_path:
-        print("yt-dlp not found in PATH. Please install it: pip install yt-dlp", file=sys.stderr)
+    if yt_dlp_override and not yt_dlp_path:
+        log.warning("YTDLP_BIN is set to %r, which is not an executable", yt_dlp_override)
         yt_dlp_available = False
-    else:
-        print(f"Using yt-dlp at: {yt_dlp_path}", file=sys.stderr)
+    elif yt_dlp_path:
+        log.info("Using yt-dlp at: %s", yt_dlp_path)
+        yt_dlp_available = True
+        # Run the resolved executable directly instead of searching PATH on every call
+        os.environ["YTDLP_BIN"] = yt_dlp_path
+    elif YoutubeDL is not None:
+        # The package works without its script being on PATH
+        log.info("yt-dlp not found in PATH, running it as: %s -m yt_dlp", sys.executable)
         yt_dlp_available = True
+    else:
+        log.warning("yt-dlp not found in PATH. Please install it: pip install yt-dlp")
+        yt_dlp_available = False
+    
+    if YoutubeDL is not None:
+        log.info("Using the yt_dlp package in-process for video information")
         
-    # Try to update yt-dlp in the background
-    if yt_dlp_available:
-        try:
-            subprocess.Popen(
-                ["yt-dlp", "--update-to", "stable"],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-        except Exception:
-            # Ignore update errors
-            pass
+    # Try to update yt-dlp in the background, if enabled and not done recently
+    update_task = None
+    if yt_dlp_available and os.environ.get("YTDLP_AUTO_UPDATE") == "1" and update_due():
+        update_task = asyncio.create_task(update_yt_dlp())
+    
+    # Per-process resources are set up here rather than at import, because
+    # the subtitle worker processes re-import this module
+    global WORK_DIR, _executor
+    WORK_DIR = tempfile.mkdtemp(prefix="ytsubs-", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    _executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="yt-dlp")
     
     try:
         yield {"yt_dlp_available": yt_dlp_available}
     finally:
-        # Clean up if needed
+        # Don't leave the updater running past shutdown
+        if update_task is not None and not update_task.done():
+            update_task.cancel()
+        shutdown_process_pool()
+        _executor.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+# Marker file whose modification time records the last update attempt
+UPDATE_MARKER = os.path.join(tempfile.gettempdir(), "ytdlp-updated")
+
+# Minimum time (in seconds) between update attempts
+UPDATE_INTERVAL = 24 * 60 * 60
+
+def update_due():
+    """Return True if yt-dlp hasn't been updated within UPDATE_INTERVAL."""
+    try:
+        return time.time() - os.path.getmtime(UPDATE_MARKER) >= UPDATE_INTERVAL
+    except OSError:
+        return True
+
+async def update_yt_dlp():
+    """Update yt-dlp to the latest stable release without blocking startup."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *yt_dlp_command(), "--update-to", "stable",
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        await proc.wait()
+        
+        # Record the attempt so restarts within UPDATE_INTERVAL skip it
+        with open(UPDATE_MARKER, "a"):
+            pass
+        os.utime(UPDATE_MARKER)
+    except Exception:
+        # Ignore update errors
         pass
 
+def yt_dlp_command():
+    """Return the command that runs yt-dlp, as resolved at startup."""
+    if "YTDLP_BIN" in os.environ:
+        return [os.environ["YTDLP_BIN"]]
+    if YoutubeDL is not None:
+        return [sys.executable, "-m", "yt_dlp"]
+    return ["yt-dlp"]
+
 # Create an MCP server with dependencies and lifespan
 mcp = FastMCP(
     "YouTube Subtitle Downloader",
@@ -49,22 +143,377 @@ mcp = FastMCP(
     lifespan=lifespan
 )
 
-def run_yt_dlp_command(args, cwd=None):
-    """Run a yt-dlp command and return the result."""
-    try:
-        result = subprocess.run(
-            ["yt-dlp"] + args,
-            check=True,
-            capture_output=True,
-            text=True,
-            cwd=cwd
-        )
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        error_message = e.stderr
+# Maximum number of yt-dlp runs (processes or in-process extractions) at once
+MAX_CONCURRENCY = int(os.environ.get("YTSUBS_MAX_CONCURRENCY", "8"))
+
+# Bounds concurrent yt-dlp runs so bursts of requests don't thrash the CPU or
+# trigger YouTube rate limits
+_yt_dlp_semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+# Shared worker threads for in-process yt_dlp extraction, created by lifespan
+_executor = None
+
+async def run_yt_dlp_command(args, cwd=None):
+    """Run a yt-dlp command without blocking the event loop and return its stdout."""
+    async with _yt_dlp_semaphore:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *yt_dlp_command(), *args,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=cwd
+            )
+        except FileNotFoundError:
+            raise RuntimeError("yt-dlp not found. Please make sure it's installed and in your PATH.")
+        
+        try:
+            stdout, stderr = await proc.communicate()
+        except asyncio.CancelledError:
+            # Don't leave yt-dlp running once its slot is given back
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                # It already exited
+                pass
+            await proc.wait()
+            raise
+    
+    if proc.returncode != 0:
+        error_message = stderr.decode("utf-8", errors="replace")
         raise RuntimeError(f"yt-dlp error: {error_message}")
-    except FileNotFoundError:
-        raise RuntimeError("yt-dlp not found. Please make sure it's installed and in your PATH.")
+    return stdout.decode("utf-8", errors="replace")
+
+# A WebVTT cue timing line, including any cue settings after the end time
+_VTT_TIMING = re.compile(r'(?:\d+:)?\d{2}:\d{2}\.\d{3} --> ')
+
+# Inline WebVTT markup such as <c>, </c> and <00:00:01.234> word timestamps
+_VTT_TAG = re.compile(r'<[^>]*>')
+
+def clean_vtt(subtitles):
+    """Clean up WebVTT formatting to make it more readable."""
+    lines = []
+    # Inside the WEBVTT header or a NOTE/STYLE/REGION block
+    skipping = True
+    # At the start of a block, where a cue identifier may appear
+    block_start = False
+    maybe_identifier = False
+    
+    for line in subtitles.split("\n"):
+        if not line.strip():
+            skipping = False
+            block_start = True
+            maybe_identifier = False
+            continue
+        if skipping:
+            continue
+        
+        if _VTT_TIMING.match(line):
+            # The line before a timing line is the cue identifier, not text
+            if maybe_identifier:
+                lines.pop()
+            block_start = maybe_identifier = False
+            continue
+        
+        if block_start and line.startswith(("NOTE", "STYLE", "REGION")):
+            skipping = True
+            continue
+        
+        # Remove inline markup and remove empty lines
+        text = html.unescape(_VTT_TAG.sub("", line)).strip()
+        maybe_identifier = block_start
+        block_start = False
+        if text:
+            lines.append(text)
+        else:
+            maybe_identifier = False
+    
+    return "".join(f"{line}\n" for line in lines)
+
+# Subtitles longer than this many characters are cleaned up in a worker
+# process; for shorter ones the IPC overhead would outweigh the work
+PROCESS_POOL_THRESHOLD = 256_000
+
+# Worker processes for cleaning up long transcripts, created on first use
+_process_pool = None
+
+def get_process_pool():
+    """Return the worker process pool, creating it if needed."""
+    global _process_pool
+    if _process_pool is None:
+        # By now the server is running threads, which fork() can deadlock
+        # on, so start the workers as fresh interpreters
+        _process_pool = ProcessPoolExecutor(
+            max_workers=2,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+def shutdown_process_pool():
+    """Stop the worker process pool, if it was started."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+async def clean_vtt_in_process_pool(subtitles):
+    """
+    Run clean_vtt in the worker process pool.
+    
+    If a worker dies (e.g. killed for running out of memory) the pool is
+    broken for good, so it is replaced and the cleanup retried once.
+    """
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = get_process_pool()
+        try:
+            return await loop.run_in_executor(pool, clean_vtt, subtitles)
+        except BrokenProcessPool:
+            log.warning("Subtitle worker process died, restarting the worker pool")
+            # Another request may already have replaced the broken pool
+            if _process_pool is pool:
+                shutdown_process_pool()
+    raise RuntimeError("subtitle worker process died while cleaning up the subtitles")
+
+# How long (in seconds) yt-dlp results are reused before fetching them again
+CACHE_TTL = float(os.environ.get("YTSUBS_CACHE_TTL", "600"))
+
+# Maximum number of results kept in the cache
+CACHE_MAXSIZE = int(os.environ.get("YTSUBS_CACHE_MAXSIZE", "512"))
+
+# How long (in seconds) a "no subtitles" result is reused, so repeated requests
+# for a missing language don't each re-run yt-dlp
+NEGATIVE_CACHE_TTL = float(os.environ.get("YTSUBS_NEGATIVE_CACHE_TTL", "60"))
+
+# Cached yt-dlp results, as key -> (expiry time, value). Keys are
+# ("info", url) for video metadata and ("subtitles", url, lang) for subtitles.
+_cache = {}
+
+# Returned by cache_get for keys that aren't cached, since None is a valid value
+_MISSING = object()
+
+# The fetch currently running for each key, shared by all concurrent callers
+_in_flight = {}
+
+def cache_get(key):
+    """Return the cached value for key, or _MISSING if it is missing or expired."""
+    entry = _cache.get(key)
+    if entry is None:
+        return _MISSING
+    
+    expires_at, value = entry
+    if time.monotonic() >= expires_at:
+        del _cache[key]
+        return _MISSING
+    return value
+
+def cache_set(key, value, ttl):
+    """Store value in the cache for ttl seconds, evicting the oldest entries when it is full."""
+    _cache.pop(key, None)
+    while _cache and len(_cache) >= CACHE_MAXSIZE:
+        # Dicts keep insertion order, so the first key is the oldest entry
+        del _cache[next(iter(_cache))]
+    _cache[key] = (time.monotonic() + ttl, value)
+
+async def fetch_and_cache(key, fetch):
+    """Run fetch() and cache its result; None is cached for NEGATIVE_CACHE_TTL."""
+    value = await fetch()
+    cache_set(key, value, NEGATIVE_CACHE_TTL if value is None else CACHE_TTL)
+    return value
+
+def fetch_done(key, task):
+    """Forget a finished fetch so that the next miss for its key starts a new one."""
+    if _in_flight.get(key) is task:
+        del _in_flight[key]
+    # Mark the exception as retrieved in case every caller was cancelled
+    if not task.cancelled():
+        task.exception()
+
+async def cached_fetch(key, fetch):
+    """
+    Return the cached value for key, calling fetch() to produce it on a miss.
+    
+    Concurrent callers for the same key all await a single fetch() and get
+    its result or exception. Exceptions are not cached.
+    """
+    value = cache_get(key)
+    if value is not _MISSING:
+        return value
+    
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch_and_cache(key, fetch))
+        _in_flight[key] = task
+        task.add_done_callback(lambda t: fetch_done(key, t))
+    
+    # Shield the shared fetch so one caller being cancelled doesn't cancel it for the others
+    return await asyncio.shield(task)
+
+def trim_video_info(info):
+    """
+    Keep only the yt-dlp metadata fields used by the tools.
+    
+    The full metadata lists every format and caption URL and can be several MB,
+    so only this trimmed dict is cached. Subtitle tracks become {code: name}.
+    """
+    def languages(tracks):
+        return {
+            lang_code: formats[0].get("name", "") if formats else ""
+            for lang_code, formats in (tracks or {}).items()
+        }
+    
+    return {
+        "title": info.get("title"),
+        "duration_string": info.get("duration_string"),
+        "channel": info.get("channel"),
+        "upload_date": info.get("upload_date"),
+        "view_count": info.get("view_count"),
+        "subtitles": languages(info.get("subtitles")),
+        "automatic_captions": languages(info.get("automatic_captions")),
+    }
+
+async def fetch_video_info_json(url):
+    """
+    Fetch the metadata for a video, trimmed by trim_video_info, using a single extractor run.
+    
+    Results are cached per URL so that get_video_info, list_subtitle_languages
+    and analyze_video share one extraction.
+    """
+    async def fetch():
+        if YoutubeDL is not None:
+            async with _yt_dlp_semaphore:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(_executor, extract_video_info, url)
+        
+        output = await run_yt_dlp_command([
+            "--skip-download",
+            "--dump-json",
+            url
+        ])
+        return trim_video_info(json.loads(output))
+    
+    return await cached_fetch(("info", url), fetch)
+
+# Options for the in-process YoutubeDL instances. Everything must stay off
+# stdout, which carries the MCP stdio transport.
+YDL_OPTIONS = {
+    "quiet": True,
+    "no_warnings": True,
+    "noprogress": True,
+    "skip_download": True,
+}
+
+# One YoutubeDL per worker thread, since instances are not safe to share
+# between threads but are worth reusing across calls
+_ydl_local = threading.local()
+
+def extract_video_info(url):
+    """Extract video metadata with the yt_dlp package, trimmed by trim_video_info."""
+    ydl = getattr(_ydl_local, "ydl", None)
+    if ydl is None:
+        ydl = _ydl_local.ydl = YoutubeDL(YDL_OPTIONS)
+    
+    try:
+        info = ydl.extract_info(url, download=False)
+    except Exception as e:
+        raise RuntimeError(f"yt-dlp error: {str(e)}")
+    return trim_video_info(info)
+
+# Working directory for downloaded subtitle files, created by lifespan once
+# per server process (on tmpfs when /dev/shm exists) instead of once per download
+WORK_DIR = None
+
+# Prints the path of every downloaded subtitle file, one per line. after_move
+# never runs with --skip-download, so this uses the final after_video stage.
+SUBTITLE_FILEPATH_TEMPLATE = "after_video:%(requested_subtitles.:.filepath)#l"
+
+async def fetch_subtitles(url, lang):
+    """
+    Download the subtitles of a video as cleaned-up text, or None if there are none.
+    
+    Results are cached per (URL, language).
+    """
+    async def fetch():
+        # Unique output name in the shared work dir
+        output_filename = os.path.join(WORK_DIR, uuid.uuid4().hex)
+        
+        try:
+            # Run yt-dlp to download just the subtitles, printing the final
+            # path of each subtitle file once it has been written
+            output = await run_yt_dlp_command([
+                "--skip-download",
+                "--write-auto-sub",
+                f"--sub-lang={lang}",
+                "--sub-format=vtt",
+                "--print", SUBTITLE_FILEPATH_TEMPLATE,
+                f"--output={output_filename}",
+                url
+            ])
+            
+            # Nothing (or "NA") is printed when no subtitles were found
+            subtitle_files = [line for line in output.splitlines() if line and line != "NA"]
+            if not subtitle_files:
+                return None
+            
+            # yt-dlp falls back to another format (json3, ttml, ...) when
+            # there is no VTT track, which clean_vtt can't handle
+            if not subtitle_files[0].endswith(".vtt"):
+                raise RuntimeError(f"no VTT subtitles available, got {os.path.basename(subtitle_files[0])}")
+            
+            # Read the downloaded subtitle file
+            try:
+                subtitles = Path(subtitle_files[0]).read_bytes().decode("utf-8")
+            except FileNotFoundError:
+                return None
+            
+            # Reading bytes skips text mode's newline translation
+            if "\r" in subtitles:
+                subtitles = subtitles.replace("\r\n", "\n")
+            
+            # Clean up long transcripts in a worker process so the regex and
+            # string work doesn't stall the event loop for other requests
+            if len(subtitles) > PROCESS_POOL_THRESHOLD:
+                return await clean_vtt_in_process_pool(subtitles)
+            return clean_vtt(subtitles)
+        finally:
+            # Remove the subtitle file and anything else yt-dlp wrote for this call
+            for path in glob.glob(glob.escape(output_filename) + ".*"):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+    
+    return await cached_fetch(("subtitles", url, lang), fetch)
+
+def format_video_info(info):
+    """Format trimmed yt-dlp metadata into the summary returned by get_video_info."""
+    upload_date = info.get("upload_date") or ""
+    
+    # Format upload date (YYYYMMDD to YYYY-MM-DD)
+    if len(upload_date) == 8:
+        upload_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
+    
+    text = f"Title: {info.get('title')}\n"
+    text += f"Duration: {info.get('duration_string')}\n"
+    text += f"Channel: {info.get('channel')}\n"
+    text += f"Upload Date: {upload_date}\n"
+    text += f"Views: {info.get('view_count')}"
+    return text
+
+def format_subtitle_languages(info):
+    """Format the subtitle and automatic caption languages found in trimmed yt-dlp metadata."""
+    languages = []
+    for key, prefix in (("subtitles", ""), ("automatic_captions", "[Auto] ")):
+        for lang_code, lang_name in info[key].items():
+            # yt-dlp reports live chat replays as a subtitle track, but
+            # they can't be downloaded as subtitles
+            if lang_code == "live_chat":
+                continue
+            languages.append(f"{lang_code}: {prefix}{lang_name}")
+    
+    if not languages:
+        return "No subtitles found for this video."
+    
+    return "Available subtitle languages:\n" + "\n".join(languages)
 
 @mcp.tool()
 async def list_subtitle_languages(url: str, ctx: Context) -> str:
@@ -82,48 +531,14 @@ async def list_subtitle_languages(url: str, ctx: Context) -> str:
     if not ctx.request_context.lifespan_context.get("yt_dlp_available", False):
         return "Error: yt-dlp is not installed. Please install it with: pip install yt-dlp"
     
-    print(f"Fetching available subtitle languages for {url}", file=sys.stderr)
+    log.info("Fetching available subtitle languages for %s", url)
     
     try:
-        # Use yt-dlp to list available subtitles
-        output = run_yt_dlp_command([
-            "--skip-download",
-            "--list-subs",
-            url
-        ])
-        
-        # Parse the output to extract language information
-        languages = []
-        in_subtitles_section = False
-        in_auto_captions_section = False
-        
-        for line in output.splitlines():
-            if "Available subtitles" in line:
-                in_subtitles_section = True
-                in_auto_captions_section = False
-                continue
-            
-            if "Available automatic captions" in line:
-                in_subtitles_section = False
-                in_auto_captions_section = True
-                continue
-                
-            if (in_subtitles_section or in_auto_captions_section) and line.strip():
-                # Look for language codes and names
-                match = re.match(r'\s*(\w+)\s+(\w+)?\s*(.*)', line)
-                if match:
-                    lang_code = match.group(1)
-                    lang_name = match.group(3).strip()
-                    prefix = "[Auto] " if in_auto_captions_section else ""
-                    languages.append(f"{lang_code}: {prefix}{lang_name}")
-        
-        if not languages:
-            return "No subtitles found for this video."
-            
-        return "Available subtitle languages:\n" + "\n".join(languages)
+        info = await fetch_video_info_json(url)
+        return format_subtitle_languages(info)
     
     except Exception as e:
-        print(f"Error listing subtitle languages: {str(e)}", file=sys.stderr)
+        log.error("Error listing subtitle languages: %s", e)
         return f"Error listing subtitle languages: {str(e)}"
 @mcp.tool()
 async def download_subtitles(url: str, ctx: Context, lang: str = "en") -> str:
@@ -142,45 +557,41 @@ async def download_subtitles(url: str, ctx: Context, lang: str = "en") -> str:
     if not ctx.request_context.lifespan_context.get("yt_dlp_available", False):
         return "Error: yt-dlp is not installed. Please install it with: pip install yt-dlp"
     
-    ctx.info(f"Downloading {lang} subtitles for {url}")
+    log.info("Downloading %s subtitles for %s", lang, url)
+    
+    try:
+        subtitles = await fetch_subtitles(url, lang)
+    except Exception as e:
+        log.error("Error downloading subtitles: %s", e)
+        return f"Error downloading subtitles: {str(e)}"
+    
+    if subtitles is None:
+        log.warning("No subtitle file found for language: %s", lang)
+        return f"No subtitles found for language: {lang}"
     
-    # Create a temporary directory
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # Define output format
-        output_filename = os.path.join(temp_dir, "subtitles")
+    return subtitles
+
+@mcp.tool()
+async def download_subtitles_bulk(urls: list[str], ctx: Context, lang: str = "en") -> dict[str, str]:
+    """
+    Download subtitles from several YouTube videos concurrently.
+    
+    Args:
+        urls: URLs of the YouTube videos
+        ctx: MCP context
+        lang: Language code for subtitles (default: 'en' for English)
         
-        try:
-            # Run yt-dlp to download just the subtitles
-            run_yt_dlp_command([
-                "--skip-download",
-                "--write-auto-sub",
-                f"--sub-lang={lang}",
-                "--convert-subs=srt",
-                f"--output={output_filename}",
-                url
-            ], cwd=temp_dir)
-            
-            # Read the downloaded subtitle file
-            subtitle_file = f"{output_filename}.{lang}.srt"
-            
-            if os.path.exists(os.path.join(temp_dir, subtitle_file)):
-                with open(os.path.join(temp_dir, subtitle_file), "r", encoding="utf-8") as f:
-                    subtitles = f.read()
-                
-                # Clean up SRT formatting to make it more readable
-                # Remove timestamps and numbers
-                cleaned_subtitles = re.sub(r'\d+\n\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3}\n', '', subtitles)
-                # Remove empty lines
-                cleaned_subtitles = re.sub(r'\n\s*\n', '\n', cleaned_subtitles)
-                
-                return cleaned_subtitles
-            else:
-                ctx.error(f"No subtitle file found: {subtitle_file}")
-                return f"No subtitles found for language: {lang}"
-                
-        except Exception as e:
-            ctx.error(f"Error downloading subtitles: {str(e)}")
-            return f"Error downloading subtitles: {str(e)}"
+    Returns:
+        The subtitles (or an error message) for each URL, keyed by URL
+    """
+    # Duplicate URLs are only downloaded once
+    unique_urls = list(dict.fromkeys(urls))
+    
+    # download_subtitles reports failures in its result instead of raising,
+    # so one bad URL doesn't affect the others. Concurrency is bounded by
+    # the yt-dlp semaphore.
+    results = await asyncio.gather(*(download_subtitles(url, ctx, lang) for url in unique_urls))
+    return dict(zip(unique_urls, results))
 
 @mcp.tool()
 async def get_video_info(url: str, ctx: Context) -> str:
@@ -198,39 +609,52 @@ async def get_video_info(url: str, ctx: Context) -> str:
     if not ctx.request_context.lifespan_context.get("yt_dlp_available", False):
         return "Error: yt-dlp is not installed. Please install it with: pip install yt-dlp"
     
-    print(f"Fetching video information for {url}", file=sys.stderr)
+    log.info("Fetching video information for %s", url)
     
     try:
-        # Run yt-dlp to get video info as JSON
-        output = run_yt_dlp_command([
-            "--skip-download",
-            "--print", "%(title)s\n%(duration_string)s\n%(channel)s\n%(upload_date)s\n%(view_count)s",
-            url
-        ])
-        
-        # Parse the output
-        lines = output.strip().split('\n')
-        if len(lines) >= 5:
-            title, duration, channel, upload_date, views = lines[:5]
-            
-            # Format upload date (YYYYMMDD to YYYY-MM-DD)
-            if len(upload_date) == 8:
-                upload_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
-                
-            info = f"Title: {title}\n"
-            info += f"Duration: {duration}\n"
-            info += f"Channel: {channel}\n"
-            info += f"Upload Date: {upload_date}\n"
-            info += f"Views: {views}"
-            
-            return info
-        else:
-            return f"Couldn't parse video information: {output}"
+        info = await fetch_video_info_json(url)
+        return format_video_info(info)
             
     except Exception as e:
-        print(f"Error getting video info: {str(e)}", file=sys.stderr)
+        log.error("Error getting video info: %s", e)
         return f"Error getting video info: {str(e)}"
 
+@mcp.tool()
+async def analyze_video(url: str, ctx: Context, lang: str = "en") -> str:
+    """
+    Get video information, available subtitle languages and subtitles in one call.
+    
+    Args:
+        url: URL of the YouTube video
+        ctx: MCP context
+        lang: Language code for subtitles (default: 'en' for English)
+        
+    Returns:
+        The video information, the available languages and the subtitles as text
+    """
+    # Check if yt-dlp is available from lifespan context
+    if not ctx.request_context.lifespan_context.get("yt_dlp_available", False):
+        return "Error: yt-dlp is not installed. Please install it with: pip install yt-dlp"
+    
+    log.info("Analyzing video %s", url)
+    
+    try:
+        # Metadata and subtitles are independent, so fetch them concurrently.
+        # A single --dump-json run provides both the info and the language list.
+        info, subtitles = await asyncio.gather(
+            fetch_video_info_json(url),
+            download_subtitles(url, ctx, lang)
+        )
+    except Exception as e:
+        log.error("Error analyzing video: %s", e)
+        return f"Error analyzing video: {str(e)}"
+    
+    return (
+        f"{format_video_info(info)}\n\n"
+        f"{format_subtitle_languages(info)}\n\n"
+        f"Subtitles ({lang}):\n{subtitles}"
+    )
+
 @mcp.prompt()
 def youtube_subtitles_workflow(url: str) -> list[types.PromptMessage]:
     """
@@ -282,21 +706,14 @@ def youtube_subtitles_workflow(url: str) -> list[types.PromptMessage]:
             role="user",
             content=types.TextContent(
                 type="text",
-                text="First, get basic information about the video."
-            )
-        ),
-        types.PromptMessage(
-            role="user",
-            content=types.TextContent(
-                type="text",
-                text="Then, list available subtitle languages."
+                text="First, use analyze_video to get the video information, available subtitle languages and subtitles in my preferred language in a single call."
             )
         ),
         types.PromptMessage(
             role="user",
             content=types.TextContent(
                 type="text",
-                text="Finally, download the subtitles in my preferred language and analyze their content."
+                text="Then, analyze the content of the subtitles."
             )
         )
     ]